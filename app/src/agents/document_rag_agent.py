@@ -2,13 +2,16 @@
 Document RAG Agent for querying documents using RAG (Retrieval Augmented Generation).
 """
 import logging
-from typing import List, Dict, Any
+import threading
+from collections import OrderedDict, deque
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+import numpy as np
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from ..services.vector_storage.vector_store import VectorStore
 from ..utils.chat_history import InMemoryChatHistory
 from ..services.document_processing.document_processors import load_and_split_document
-from ..prompts.document_rag import DOCUMENT_RAG_PROMPT
+from ..prompts.document_rag import DOCUMENT_RAG_PROMPT, CONVERSATION_SUMMARY_PROMPT
 
 # Set up logging
 logging.basicConfig(
@@ -21,7 +24,14 @@ logger = logging.getLogger(__name__)
 class DocumentRagAgent:
     """
     Agent for querying documents using RAG (Retrieval Augmented Generation).
+    
+    Answers are cached per conversation and reused when a new question's
+    embedding is within SEMANTIC_CACHE_THRESHOLD cosine similarity of an
+    earlier one.
     """
+    SEMANTIC_CACHE_THRESHOLD = 0.95
+    SEMANTIC_CACHE_SIZE = 64  # Cached answers kept per conversation
+    SEMANTIC_CACHE_CONVERSATIONS = 1000
     
     def __init__(self, 
                  model_name: str = "gpt-4o-mini", 
@@ -45,6 +55,103 @@ class DocumentRagAgent:
         self.rag_prompt = ChatPromptTemplate.from_messages([
             ("system", DOCUMENT_RAG_PROMPT)
         ])
+        self.summary_prompt = ChatPromptTemplate.from_messages([
+            ("system", CONVERSATION_SUMMARY_PROMPT)
+        ])
+        
+        # conversation_id -> deque of (unit query embedding, answer, sources);
+        # guarded by a lock because streamed queries run in a threadpool
+        self._answer_cache = OrderedDict()
+        self._answer_cache_lock = threading.Lock()
+
+    def _lookup_cached_answer(self, conversation_id: str, embedding: np.ndarray) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached answer for a semantically near-identical question.
+        
+        Args:
+            conversation_id: The ID of the conversation
+            embedding: Unit-normalized embedding of the new question
+            
+        Returns:
+            Dict with the cached answer and sources, or None on a miss
+        """
+        with self._answer_cache_lock:
+            entries = self._answer_cache.get(conversation_id)
+            if not entries:
+                return None
+            self._answer_cache.move_to_end(conversation_id)
+            entries = list(entries)
+        similarities = np.stack([entry[0] for entry in entries]) @ embedding
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.SEMANTIC_CACHE_THRESHOLD:
+            return None
+        _, answer, sources = entries[best]
+        return {"answer": answer, "sources": sources}
+
+    def _cache_answer(self, conversation_id: str, embedding: np.ndarray, answer: str, sources: List[Dict[str, Any]]) -> None:
+        """
+        Remember an answer for later semantic cache lookups.
+        
+        Args:
+            conversation_id: The ID of the conversation
+            embedding: Unit-normalized embedding of the question
+            answer: The generated answer
+            sources: The sources used for the answer
+        """
+        with self._answer_cache_lock:
+            entries = self._answer_cache.get(conversation_id)
+            if entries is None:
+                entries = deque(maxlen=self.SEMANTIC_CACHE_SIZE)
+                self._answer_cache[conversation_id] = entries
+                if len(self._answer_cache) > self.SEMANTIC_CACHE_CONVERSATIONS:
+                    self._answer_cache.popitem(last=False)
+            entries.append((embedding, answer, sources))
+
+    def _embed_question(self, question: str) -> Tuple[List[float], np.ndarray]:
+        """
+        Embed a question once for both retrieval and the semantic cache.
+        
+        Args:
+            question: The question to embed
+            
+        Returns:
+            Tuple of the raw embedding and its unit-normalized array
+        """
+        embedding = self.vector_store.embed_query(question)
+        vector = np.asarray(embedding, dtype=np.float32)
+        return embedding, vector / (np.linalg.norm(vector) or 1.0)
+
+    def _retrieve_context(self, embedding: List[float]) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Retrieve relevant chunks and format them for the RAG prompt.
+        
+        Args:
+            embedding: Embedding of the question to answer
+            
+        Returns:
+            Tuple of the formatted context string and the list of sources
+        """
+        # Retrieve relevant documents
+        docs = self.vector_store.similarity_search_by_vector(embedding, k=self.retrieval_k)
+        
+        # Format context from retrieved documents
+        context = ""
+        sources = []
+        
+        if docs:
+            context = "\n\n".join([f"Document: {doc.metadata.get('title', 'Unknown')}\nPage: {doc.metadata.get('page', 'N/A')}\nContent: {doc.page_content}" for doc in docs])
+            
+            # Format sources
+            for doc in docs:
+                source = {
+                    "title": doc.metadata.get("title", "Unknown"),
+                    "document_id": doc.metadata.get("document_id", ""),
+                    "page": doc.metadata.get("page", "N/A"),
+                    "snippet": doc.page_content[:200] + "..." if len(doc.page_content) > 200 else doc.page_content
+                }
+                sources.append(source)
+        
+        return context, sources
 
     def query(self, question: str, conversation_id: str) -> Dict[str, Any]:
         """
@@ -55,31 +162,19 @@ class DocumentRagAgent:
             conversation_id: The ID of the conversation
             
         Returns:
-            Dict containing the answer and sources
+            Dict containing the answer, sources and whether it was cached
         """
         try:
             # Add user message to history
             InMemoryChatHistory.add_message(conversation_id, "human", question)
             
-            # Retrieve relevant documents
-            docs = self.vector_store.similarity_search(question, k=self.retrieval_k)
-            
-            # Format context from retrieved documents
-            context = ""
-            sources = []
-            
-            if docs:
-                context = "\n\n".join([f"Document: {doc.metadata.get('title', 'Unknown')}\nPage: {doc.metadata.get('page', 'N/A')}\nContent: {doc.page_content}" for doc in docs])
-                
-                # Format sources
-                for doc in docs:
-                    source = {
-                        "title": doc.metadata.get("title", "Unknown"),
-                        "document_id": doc.metadata.get("document_id", ""),
-                        "page": doc.metadata.get("page", "N/A"),
-                        "snippet": doc.page_content[:200] + "..." if len(doc.page_content) > 200 else doc.page_content
-                    }
-                    sources.append(source)
+            embedding, unit_embedding = self._embed_question(question)
+            cached = self._lookup_cached_answer(conversation_id, unit_embedding)
+            if cached is not None:
+                InMemoryChatHistory.add_message(conversation_id, "ai", cached["answer"])
+                return {**cached, "cached": True}
+            
+            context, sources = self._retrieve_context(embedding)
             
             # Generate answer using RAG prompt
             chain = self.rag_prompt | self.llm
@@ -87,16 +182,76 @@ class DocumentRagAgent:
             
             # Add AI response to history
             InMemoryChatHistory.add_message(conversation_id, "ai", answer.content)
+            self._cache_answer(conversation_id, unit_embedding, answer.content, sources)
             
             return {
                 "answer": answer.content,
-                "sources": sources
+                "sources": sources,
+                "cached": False
             }
         except Exception as e:
             logger.error(f"Error querying documents: {str(e)}")
             error_message = f"An error occurred while processing your query: {str(e)}"
             InMemoryChatHistory.add_message(conversation_id, "ai", error_message)
             return {"answer": error_message, "sources": []}
+
+    def stream_query(self, question: str, conversation_id: str) -> Iterator[Dict[str, Any]]:
+        """
+        Query the documents using RAG, yielding the answer as it is generated.
+        
+        Args:
+            question: The question to answer
+            conversation_id: The ID of the conversation
+            
+        Yields:
+            A {"sources": [...], "cached": bool} frame first, then {"delta": str} frames
+        """
+        try:
+            # Add user message to history
+            InMemoryChatHistory.add_message(conversation_id, "human", question)
+            
+            embedding, unit_embedding = self._embed_question(question)
+            cached = self._lookup_cached_answer(conversation_id, unit_embedding)
+            if cached is not None:
+                InMemoryChatHistory.add_message(conversation_id, "ai", cached["answer"])
+                yield {"sources": cached["sources"], "cached": True}
+                yield {"delta": cached["answer"]}
+                return
+            
+            context, sources = self._retrieve_context(embedding)
+            yield {"sources": sources, "cached": False}
+            
+            # Stream the answer token by token
+            chain = self.rag_prompt | self.llm
+            parts = []
+            for chunk in chain.stream({"context": context, "question": question}):
+                if chunk.content:
+                    parts.append(chunk.content)
+                    yield {"delta": chunk.content}
+            
+            # Add AI response to history
+            answer = "".join(parts)
+            InMemoryChatHistory.add_message(conversation_id, "ai", answer)
+            self._cache_answer(conversation_id, unit_embedding, answer, sources)
+        except Exception as e:
+            logger.error(f"Error querying documents: {str(e)}")
+            error_message = f"An error occurred while processing your query: {str(e)}"
+            InMemoryChatHistory.add_message(conversation_id, "ai", error_message)
+            yield {"delta": error_message}
+    
+    def summarize_messages(self, messages: List[Dict[str, Any]]) -> str:
+        """
+        Summarize a list of chat messages.
+        
+        Args:
+            messages: Message dictionaries with "type" and "content" keys
+            
+        Returns:
+            The summary text
+        """
+        conversation = "\n".join(f"{message.get('type', 'ai')}: {message.get('content', '')}" for message in messages)
+        chain = self.summary_prompt | self.llm
+        return chain.invoke({"conversation": conversation}).content
     
     def process_document(self, file_path: str, document_id: str, title: str) -> Dict[str, Any]:
         """
@@ -128,6 +283,10 @@ class DocumentRagAgent:
             # Index chunks to vector store
             self.vector_store.add_documents(chunks)
             
+            # Cached answers may no longer reflect the indexed documents
+            with self._answer_cache_lock:
+                self._answer_cache.clear()
+            
             return {
                 "status": "success",
                 "document_id": document_id,
@@ -163,6 +322,8 @@ class DocumentRagAgent:
             
             # Delete document
             self.vector_store.delete_document(document_id)
+            with self._answer_cache_lock:
+                self._answer_cache.clear()
             
             return {
                 "status": "success",
@@ -2,12 +2,15 @@
 API routes for document management and RAG functionality.
 """
 import os
+import json
+import asyncio
 import uuid
 import logging
 import tempfile
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 from fastapi import APIRouter, UploadFile, File, Form, BackgroundTasks, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from ..agents.document_rag_agent import DocumentRagAgent
@@ -43,11 +46,18 @@ class DocumentResponse(BaseModel):
 class QueryResponse(BaseModel):
     answer: str
     sources: List[Dict[str, Any]]
+    cached: bool = False
 
 class ConversationResponse(BaseModel):
     conversation_id: str
     messages: List[Dict[str, Any]]
 
+class SummaryRequest(BaseModel):
+    messages: List[Dict[str, Any]]
+
+class SummaryResponse(BaseModel):
+    summary: str
+
 class DeleteResponse(BaseModel):
     status: str
     message: str
@@ -79,8 +89,8 @@ async def upload_document(
             tmp.write(contents)
             tmp_path = tmp.name
         
-        # Process document in background
-        result = document_agent.process_document(tmp_path, document_id, title)
+        # Index in a worker thread so concurrent uploads don't serialize on the event loop
+        result = await asyncio.to_thread(document_agent.process_document, tmp_path, document_id, title)
         
         # Clean up temporary file
         os.unlink(tmp_path)
@@ -140,12 +150,27 @@ async def query_documents(query_request: QueryRequest):
         
         return QueryResponse(
             answer=result["answer"],
-            sources=result["sources"]
+            sources=result["sources"],
+            cached=result.get("cached", False)
         )
     except Exception as e:
         logger.error(f"Error querying documents: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error querying documents: {str(e)}")
 
+@router.post("/query/stream")
+async def stream_query_documents(query_request: QueryRequest):
+    """
+    Query documents using RAG, streaming the answer as server-sent events
+    """
+    def event_stream():
+        for frame in document_agent.stream_query(
+            query_request.query,
+            query_request.conversation_id
+        ):
+            yield f"data: {json.dumps(frame)}\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 @router.delete("/documents/{document_id}", response_model=DeleteResponse)
 async def delete_document(document_id: str):
     """
@@ -173,7 +198,7 @@ async def get_conversation(conversation_id: str):
     Get conversation history
     """
     try:
-        messages = InMemoryChatHistory.get_history(conversation_id)
+        messages = InMemoryChatHistory.get_messages(conversation_id)
         
         return ConversationResponse(
             conversation_id=conversation_id,
@@ -183,6 +208,19 @@ async def get_conversation(conversation_id: str):
         logger.error(f"Error getting conversation: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error getting conversation: {str(e)}")
 
+@router.post("/conversation/summarize", response_model=SummaryResponse)
+async def summarize_conversation(summary_request: SummaryRequest):
+    """
+    Summarize a list of conversation messages
+    """
+    try:
+        summary = document_agent.summarize_messages(summary_request.messages)
+        
+        return SummaryResponse(summary=summary)
+    except Exception as e:
+        logger.error(f"Error summarizing conversation: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error summarizing conversation: {str(e)}")
+
 @router.delete("/conversation/{conversation_id}", response_model=DeleteResponse)
 async def clear_conversation(conversation_id: str):
     """
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, BackgroundTasks
 from fastapi.responses import JSONResponse
 from typing import List, Optional, Dict, Any
+import asyncio
 import logging
 import os
 import uuid
@@ -58,6 +59,67 @@ async def health_check():
     """Health check endpoint for the Menu Extraction API."""
     return {"status": "healthy"}
 
+def _put_image(filename: str, content_type: str, contents: bytes) -> str:
+    """
+    Store one image in S3, falling back to local storage, and return its URL.
+    
+    Args:
+        filename: Unique filename to store the image under
+        content_type: MIME type of the image
+        contents: Raw image bytes
+        
+    Returns:
+        Public URL of the stored image
+    """
+    logger.info(f"Attempting to upload file to S3: {filename}")
+    
+    try:
+        # Upload to S3 with public-read ACL to make it accessible
+        s3_client.put_object(
+            Bucket=S3_BUCKET_NAME,
+            Key=f"menu_images/{filename}",
+            Body=contents,
+            ContentType=content_type,
+            ACL='public-read'  # Make the object publicly readable
+        )
+        
+        # Generate direct S3 URL without pre-signed parameters
+        direct_url = f"https://{S3_BUCKET_NAME}.s3.amazonaws.com/menu_images/{filename}"
+        logger.info(f"Successfully uploaded to S3. Direct URL: {direct_url}")
+        return direct_url
+    
+    except ClientError as e:
+        logger.error(f"AWS S3 ClientError: {e.response.get('Error', {}).get('Code', 'Unknown')} - {e.response.get('Error', {}).get('Message', str(e))}")
+        # Fall back to local storage
+        local_path = os.path.join(UPLOAD_DIR, filename)
+        with open(local_path, "wb") as f:
+            f.write(contents)
+        
+        # Generate local URL
+        image_url = f"/static/uploads/{filename}"
+        logger.warning(f"Falling back to local storage. URL: {image_url}")
+        return image_url
+
+async def _store_uploaded_image(original_filename: str, content_type: str, contents: bytes) -> str:
+    """
+    Store an uploaded image in a worker thread so blocking S3 calls run concurrently.
+    
+    Args:
+        original_filename: Filename as uploaded by the client
+        content_type: MIME type of the image
+        contents: Raw image bytes
+        
+    Returns:
+        Public URL of the stored image
+    """
+    # Generate a unique filename
+    filename = f"{uuid.uuid4()}{os.path.splitext(original_filename)[1]}"
+    try:
+        return await asyncio.to_thread(_put_image, filename, content_type, contents)
+    except Exception as e:
+        logger.error(f"Error processing file {original_filename}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error processing file {original_filename}: {str(e)}")
+
 @router.post("/menu-extraction/upload-images")
 async def upload_images(
     files: List[UploadFile] = File(...),
@@ -79,48 +141,20 @@ async def upload_images(
         # Create a new session ID if one doesn't exist
         session_id = str(uuid.uuid4())
         
-        image_urls = []
-        
+        # Read all files first, then store them concurrently off the event loop
+        uploads = []
         for file in files:
             try:
-                # Read file content
                 contents = await file.read()
-                
-                # Generate a unique filename
-                filename = f"{uuid.uuid4()}{os.path.splitext(file.filename)[1]}"
-                
-                logger.info(f"Attempting to upload file to S3: {filename}")
-                
-                try:
-                    # Upload to S3 with public-read ACL to make it accessible
-                    s3_client.put_object(
-                        Bucket=S3_BUCKET_NAME,
-                        Key=f"menu_images/{filename}",
-                        Body=contents,
-                        ContentType=file.content_type,
-                        ACL='public-read'  # Make the object publicly readable
-                    )
-                    
-                    # Generate direct S3 URL without pre-signed parameters
-                    direct_url = f"https://{S3_BUCKET_NAME}.s3.amazonaws.com/menu_images/{filename}"
-                    logger.info(f"Successfully uploaded to S3. Direct URL: {direct_url}")
-                    image_urls.append(direct_url)
-                
-                except ClientError as e:
-                    logger.error(f"AWS S3 ClientError: {e.response.get('Error', {}).get('Code', 'Unknown')} - {e.response.get('Error', {}).get('Message', str(e))}")
-                    # Fall back to local storage
-                    local_path = os.path.join(UPLOAD_DIR, filename)
-                    with open(local_path, "wb") as f:
-                        f.write(contents)
-                    
-                    # Generate local URL
-                    image_url = f"/static/uploads/{filename}"
-                    logger.warning(f"Falling back to local storage. URL: {image_url}")
-                    image_urls.append(image_url)
-                
             except Exception as e:
                 logger.error(f"Error processing file {file.filename}: {str(e)}")
                 raise HTTPException(status_code=500, detail=f"Error processing file {file.filename}: {str(e)}")
+            uploads.append((file.filename, file.content_type, contents))
+        
+        image_urls = list(await asyncio.gather(*(
+            _store_uploaded_image(filename, content_type, contents)
+            for filename, content_type, contents in uploads
+        )))
         
         # Store the image URLs in a custom session dictionary
         # We'll use a simple dictionary approach since we don't need the full agent functionality
@@ -0,0 +1,94 @@
+"""
+Adaptive concurrency limiting for slow backend calls.
+"""
+import threading
+from typing import Callable
+
+import requests
+
+# Responses that signal the backend is overloaded
+OVERLOAD_STATUS_CODES = {429, 502, 503, 504}
+
+class LimiterTimeout(Exception):
+    """
+    Raised when no request slot frees up within the limiter's wait timeout.
+
+    This is local queueing, not a server failure, so it is deliberately not a
+    requests exception and callers should not treat it as the API being down.
+    """
+
+class AdaptiveLimiter:
+    """
+    AIMD (additive increase, multiplicative decrease) limit on in-flight requests.
+
+    Every non-overloaded response raises the limit by one up to `maximum`; an
+    overload status, timeout, connection error or exhausted status retry cuts it
+    by `decrease_factor` down to `minimum`, the same way TCP backs off under
+    congestion.
+    """
+
+    def __init__(
+        self,
+        initial: int = 2,
+        maximum: int = 8,
+        minimum: int = 1,
+        decrease_factor: float = 0.5,
+        wait_timeout: float = 60.0
+    ):
+        """
+        Initialize the limiter.
+
+        Args:
+            initial: Starting number of concurrent requests allowed
+            maximum: Upper bound for the limit
+            minimum: Lower bound for the limit
+            decrease_factor: Multiplier applied to the limit on overload
+            wait_timeout: Seconds to wait for a free slot before giving up
+        """
+        self.limit = initial
+        self.maximum = maximum
+        self.minimum = minimum
+        self.decrease_factor = decrease_factor
+        self.wait_timeout = wait_timeout
+        self._in_flight = 0
+        self._condition = threading.Condition()
+
+    def run(self, send: Callable[[], requests.Response]) -> requests.Response:
+        """
+        Run a request once a slot is free and adjust the limit from its outcome.
+
+        Args:
+            send: Zero-argument callable that performs the request
+
+        Returns:
+            The response returned by `send`
+
+        Raises:
+            LimiterTimeout: If no slot frees up within `wait_timeout` seconds
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._in_flight < self.limit, timeout=self.wait_timeout):
+                raise LimiterTimeout("The server is busy with other requests. Please try again in a moment.")
+            self._in_flight += 1
+
+        overloaded = None  # Left unset for errors that say nothing about load
+        try:
+            response = send()
+            overloaded = response.status_code in OVERLOAD_STATUS_CODES
+            return response
+        except (
+            requests.exceptions.Timeout,
+            requests.exceptions.ConnectionError,
+            # Raised once the session's own Retry gives up on 502/503/504
+            requests.exceptions.RetryError
+        ):
+            overloaded = True
+            raise
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+                if overloaded:
+                    self.limit = max(self.minimum, int(self.limit * self.decrease_factor))
+                elif overloaded is not None:
+                    self.limit = min(self.maximum, self.limit + 1)
+                self._condition.notify_all()
@@ -0,0 +1,57 @@
+"""
+Pooled HTTP sessions shared by the Streamlit apps.
+"""
+from typing import Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+Timeout = Union[float, Tuple[float, float]]
+
+class _TimeoutSession(requests.Session):
+    """Session that applies a default timeout when a call does not pass one."""
+
+    def __init__(self, timeout: Timeout):
+        super().__init__()
+        self.default_timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.default_timeout)
+        return super().request(method, url, **kwargs)
+
+def make_http_session(retry_post: bool = False, timeout: Optional[Timeout] = None) -> requests.Session:
+    """
+    Build a session with a pooled, retrying adapter for http and https.
+
+    Args:
+        retry_post: Also retry POSTs. They are not idempotent, so in that case
+            only failures the server cannot have processed are retried:
+            connection errors and 503 Service Unavailable.
+        timeout: Default (connect, read) timeout for calls that do not pass one
+
+    Returns:
+        The configured session
+    """
+    if retry_post:
+        retry = Retry(
+            total=3,
+            connect=2,
+            read=0,
+            backoff_factor=0.3,
+            status_forcelist=[503],
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS | {"POST"}
+        )
+    else:
+        retry = Retry(
+            total=3,
+            connect=2,
+            read=2,
+            backoff_factor=0.3,
+            status_forcelist=[502, 503, 504]
+        )
+    session = _TimeoutSession(timeout) if timeout is not None else requests.Session()
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
@@ -0,0 +1,44 @@
+"""
+JSON encoding helpers for request bodies and API responses.
+
+Uses orjson when it is installed and the standard library otherwise, with the
+same return types either way.
+"""
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson.JSONDecodeError subclasses this, so one except clause covers both
+JSONDecodeError = json.JSONDecodeError
+
+def dumps(obj: Any) -> bytes:
+    """
+    Serialize an object to compact UTF-8 JSON bytes.
+
+    Args:
+        obj: The object to serialize
+
+    Returns:
+        The encoded JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Parse JSON from bytes or text.
+
+    Args:
+        data: The JSON document, e.g. response.content
+
+    Returns:
+        The decoded object
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
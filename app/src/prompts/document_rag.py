@@ -22,3 +22,15 @@ IMPORTANT INSTRUCTIONS:
 Context: {context}
 Question: {question}
 """
+
+# Placeholder: {conversation} - earlier chat turns, one "Role: content" line per message
+CONVERSATION_SUMMARY_PROMPT = """Summarize the following conversation between a user and a document Q&A assistant.
+
+INSTRUCTIONS:
+- Keep the questions the user asked and the key facts given in the answers.
+- If the conversation starts with an earlier summary, merge it into the new summary.
+- Use short bullet points and stay under 200 words.
+
+Conversation:
+{conversation}
+"""
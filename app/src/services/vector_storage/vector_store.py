@@ -89,6 +89,34 @@ class VectorStore:
         
         return self.vector_store.similarity_search(query, k=k)
     
+    def embed_query(self, query: str) -> List[float]:
+        """
+        Embed a query string with the store's embedding model.
+        
+        Args:
+            query: The query string
+            
+        Returns:
+            The query embedding
+        """
+        return self.embeddings.embed_query(query)
+    
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4) -> List[Document]:
+        """
+        Perform a similarity search with a precomputed query embedding.
+        
+        Args:
+            embedding: The query embedding
+            k: Number of results to return
+            
+        Returns:
+            List of similar documents
+        """
+        if self.vector_store is None:
+            raise ValueError("Vector store not initialized. Add documents first.")
+        
+        return self.vector_store.similarity_search_by_vector(embedding, k=k)
+    
     def clear(self) -> None:
         """
         Clear the vector store.
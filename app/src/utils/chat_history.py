@@ -2,38 +2,65 @@
 Chat history utilities for managing conversation history.
 """
 import logging
+import os
+import threading
+from collections import OrderedDict, deque
 from langchain_community.chat_message_histories import ChatMessageHistory
 from langchain_core.chat_history import BaseChatMessageHistory
 from langchain_community.chat_message_histories import RedisChatMessageHistory
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[logging.StreamHandler()]
-)
+# Module logger; handler configuration is owned by the application
 logger = logging.getLogger(__name__)
 
 class InMemoryChatHistory:
     """
     In-memory chat history manager for storing conversation history.
+
+    Conversations are kept in least-recently-used order and evicted once
+    CHAT_HISTORY_MAX_CONVS is exceeded; each conversation retains at most
+    CHAT_HISTORY_MAX_MSGS messages. All access goes through _lock, since the
+    API serves requests from several threads.
     """
-    _history_store = {}  # Class variable to store all conversations
+    _history_store = OrderedDict()  # Class variable to store all conversations
+    _lock = threading.RLock()
+    _max_conversations = int(os.getenv("CHAT_HISTORY_MAX_CONVS", "10000"))
+    _max_messages = int(os.getenv("CHAT_HISTORY_MAX_MSGS", "200"))
 
     @classmethod
     def get_history(cls, conversation_id):
         """
         Get or create a chat history for a conversation ID
         
+        Args:
+            conversation_id: Unique identifier for the conversation
+            
+        Returns:
+            Deque of message dictionaries
+        """
+        with cls._lock:
+            history = cls._history_store.get(conversation_id)
+            if history is None:
+                history = deque(maxlen=cls._max_messages)
+                cls._history_store[conversation_id] = history
+                if len(cls._history_store) > cls._max_conversations:
+                    cls._history_store.popitem(last=False)
+            else:
+                cls._history_store.move_to_end(conversation_id)
+            return history
+
+    @classmethod
+    def get_messages(cls, conversation_id):
+        """
+        Get a snapshot of the messages in a conversation
+        
         Args:
             conversation_id: Unique identifier for the conversation
             
         Returns:
             List of message dictionaries
         """
-        if conversation_id not in cls._history_store:
-            cls._history_store[conversation_id] = []
-        return cls._history_store[conversation_id]
+        with cls._lock:
+            return list(cls.get_history(conversation_id))
 
     @classmethod
     def add_message(cls, conversation_id, role, content):
@@ -46,11 +73,12 @@ class InMemoryChatHistory:
             content: Content of the message
             
         Returns:
-            Updated history list
+            Updated history deque
         """
-        history = cls.get_history(conversation_id)
-        history.append({"type": role, "content": content})
-        return history
+        with cls._lock:
+            history = cls.get_history(conversation_id)
+            history.append({"type": role, "content": content})
+            return history
 
     @classmethod
     def clear_history(cls, conversation_id):
@@ -63,8 +91,10 @@ class InMemoryChatHistory:
         Returns:
             Empty list
         """
-        if conversation_id in cls._history_store:
-            cls._history_store[conversation_id] = []
+        with cls._lock:
+            history = cls._history_store.get(conversation_id)
+            if history is not None:
+                history.clear()
         return []
 
 def get_chat_history(conversation_id: str) -> BaseChatMessageHistory:
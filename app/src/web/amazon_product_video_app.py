@@ -1,8 +1,17 @@
 import streamlit as st
 import requests
-import json
+import os
+import sys
 import time
 
+# Add project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
+sys.path.insert(0, project_root)
+
+from app.src.core import json_utils
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
 # This should be the URL where your FastAPI app is running
 FASTAPI_BACKEND_URL = "http://localhost:8000/api/n8n-webhook/amazon-product"
 
@@ -52,30 +61,26 @@ with col1:
                     # Make a POST request to our FastAPI backend
                     response = requests.post(
                         FASTAPI_BACKEND_URL, 
-                        json=payload
+                        data=json_utils.dumps(payload),
+                        headers=JSON_HEADERS
                     )
                     
                     if response.status_code == 200:
                         st.success("✅ Workflow triggered successfully!")
                         
                         # Display the response
-                        result = response.json()
+                        result = json_utils.loads(response.content)
                         
-                        # Create expandable sections for better organization
-                        with st.expander("📋 Response Details", expanded=True):
-                            col_status, col_message = st.columns(2)
-                            
-                            with col_status:
-                                st.info(f"**Status:** {result.get('status', 'Unknown')}")
-                            
-                            with col_message:
-                                st.info(f"**Message:** {result.get('message', 'No message')}")
-                            
-                            if result.get('workflow_id'):
-                                st.success(f"**Workflow ID:** {result.get('workflow_id')}")
-                            
-                            if result.get('execution_id'):
-                                st.success(f"**Execution ID:** {result.get('execution_id')}")
+                        # Render the summary as a single markdown element
+                        summary = (
+                            f"**Status:** {result.get('status', 'Unknown')} &nbsp;&nbsp; "
+                            f"**Message:** {result.get('message', 'No message')}"
+                        )
+                        if result.get('workflow_id'):
+                            summary += f"  \n**Workflow ID:** {result.get('workflow_id')}"
+                        if result.get('execution_id'):
+                            summary += f"  \n**Execution ID:** {result.get('execution_id')}"
+                        st.markdown(summary)
                         
                         # Show full response in a code block
                         with st.expander("🔍 Full Response", expanded=False):
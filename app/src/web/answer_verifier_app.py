@@ -13,12 +13,14 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../..
 sys.path.insert(0, project_root)
 
 from app.src.core.config import get_settings
+from app.src.core import json_utils
 
 # Load environment variables
 load_dotenv()
 
 # API endpoint
 API_URL = "https://trt-demo-ai-bots.demotrt.com"
+JSON_HEADERS = {"Content-Type": "application/json"}
 
 # Set page config
 st.set_page_config(
@@ -60,10 +62,10 @@ def verify_answer(question, student_answer):
     }
     
     # Send the data to the API
-    response = requests.post(f"{API_URL}/verify-answer", json=data)
+    response = requests.post(f"{API_URL}/verify-answer", data=json_utils.dumps(data), headers=JSON_HEADERS)
     
     if response.status_code == 200:
-        return {"success": True, "result": response.json()}
+        return {"success": True, "result": json_utils.loads(response.content)}
     else:
         return {"success": False, "message": f"Error: {response.text}"}
 
@@ -3,14 +3,20 @@ Streamlit app for Document RAG (Retrieval Augmented Generation).
 """
 import streamlit as st
 import os
+import sys
 import uuid
-import tempfile
 import time
 from datetime import datetime
-import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import json
 from typing import List, Dict, Any
 
+# Add project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
+sys.path.insert(0, project_root)
+
+from app.src.core.http_session import make_http_session
+
 # Set page configuration
 st.set_page_config(
     page_title="Document RAG",
@@ -22,132 +28,210 @@ st.set_page_config(
 # Constants
 API_BASE_URL = "http://127.0.0.1:8000/api"  # Update with your API URL
 ALLOWED_EXTENSIONS = ['.pdf', '.docx', '.pptx', '.ppt', '.xlsx', '.xls', '.html', '.htm', '.txt']
+MAX_CHAT_MESSAGES = 100  # Fold older messages into a summary beyond this
+SUMMARIZE_CHAT_MESSAGES = 60  # Number of oldest messages folded each time
+UPLOAD_TYPES = [ext.lstrip(".") for ext in ALLOWED_EXTENSIONS]  # file_uploader expects no leading dot
+DEFAULT_TIMEOUT = (3, 30)  # (connect, read) seconds
+UPLOAD_TIMEOUT = (3, 300)  # Uploads are indexed (split, embedded, upserted) before the response
+SUMMARIZE_TIMEOUT = (3, 120)  # An LLM call over a large slice of the conversation
 
-# Initialize session state
-if "conversation_id" not in st.session_state:
-    st.session_state.conversation_id = str(uuid.uuid4())
+@st.cache_resource
+def _get_http_session():
+    """Shared HTTP session so keep-alive connections survive Streamlit reruns"""
+    return make_http_session(retry_post=True, timeout=DEFAULT_TIMEOUT)
 
-if "messages" not in st.session_state:
-    st.session_state.messages = []
+_SESSION = _get_http_session()
 
-if "documents" not in st.session_state:
-    st.session_state.documents = []
+# Initialize session state
+_SESSION_DEFAULTS = {
+    "conversation_id": str(uuid.uuid4()),
+    "messages": [],
+    "messages_summary": "",
+    "documents": [],
+    "api_key": os.environ.get("OPENAI_API_KEY", ""),
+    "retrieval_k": 3,
+}
+for key, value in _SESSION_DEFAULTS.items():
+    st.session_state.setdefault(key, value)
 
-if "api_key" not in st.session_state:
-    st.session_state.api_key = os.environ.get("OPENAI_API_KEY", "")
+# Helper functions
+@st.cache_data(ttl=5, show_spinner=False)
+def _get_conversation_history(conversation_id):
+    """Return the message list for a conversation from the API"""
+    response = _SESSION.get(f"{API_BASE_URL}/conversation/{conversation_id}")
+    if response.status_code == 200:
+        return response.json().get("messages", [])
+    return None
 
-if "retrieval_k" not in st.session_state:
-    st.session_state.retrieval_k = 3
+@st.cache_data(ttl=30, show_spinner=False)
+def _get_documents():
+    """Return the document list from the API, raising on API errors"""
+    response = _SESSION.get(f"{API_BASE_URL}/documents")
+    if response.status_code != 200:
+        raise RuntimeError(response.text)
+    result = response.json()
+    if result["status"] != "success":
+        raise RuntimeError(result.get('message', 'Unknown error'))
+    return result.get("documents", [])
 
-# Helper functions
-def fetch_conversation_history():
-    """Fetch conversation history from API"""
+def _apply_conversation_history(get_messages):
+    """Store the result of a conversation history fetch in session state, returning whether it succeeded"""
     try:
-        response = requests.get(
-            f"{API_BASE_URL}/conversation/{st.session_state.conversation_id}"
-        )
-        if response.status_code == 200:
-            history = response.json()
-            st.session_state.messages = history.get("messages", [])
+        messages = get_messages()
+        if messages is None:
+            return False
+        st.session_state.messages = messages
+        compact_messages()
+        return True
     except Exception as e:
         st.error(f"Error fetching conversation history: {str(e)}")
+        return False
 
-def fetch_documents():
-    """Fetch list of documents from API"""
+def _apply_documents(get_documents):
+    """Store the result of a document list fetch in session state"""
     try:
-        response = requests.get(f"{API_BASE_URL}/documents")
-        if response.status_code == 200:
-            result = response.json()
-            if result["status"] == "success":
-                st.session_state.documents = result.get("documents", [])
-            else:
-                st.error(f"Error fetching documents: {result.get('message', 'Unknown error')}")
-        else:
-            st.error(f"Error fetching documents: {response.text}")
+        st.session_state.documents = get_documents()
     except Exception as e:
         st.error(f"Error fetching documents: {str(e)}")
 
-def upload_document(file, title=None):
-    """Upload a document to the API"""
-    try:
-        if not title:
-            title = file.name
-        
-        # Create a temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.name)[1]) as tmp:
-            tmp.write(file.getbuffer())
-            tmp_path = tmp.name
-        
-        # Upload the file
-        with open(tmp_path, "rb") as f:
-            files = {"file": (file.name, f)}
-            data = {"title": title}
-            response = requests.post(
-                f"{API_BASE_URL}/documents/upload",
-                files=files,
-                data=data
-            )
-        
-        # Clean up the temporary file
-        os.unlink(tmp_path)
-        
-        if response.status_code == 200:
-            result = response.json()
-            st.success(f"Document uploaded successfully: {title}")
-            # Fetch updated document list
-            fetch_documents()
-            return result
-        else:
-            st.error(f"Error uploading document: {response.text}")
-            return None
-    except Exception as e:
-        st.error(f"Error uploading document: {str(e)}")
-        return None
+def fetch_conversation_history():
+    """Fetch conversation history from API"""
+    conversation_id = st.session_state.conversation_id
+    _apply_conversation_history(lambda: _get_conversation_history(conversation_id))
+
+def fetch_documents():
+    """Fetch list of documents from API"""
+    _apply_documents(_get_documents)
+
+def _post_document(file, title):
+    """Upload a single document to the API, raising on API errors"""
+    # Send the in-memory upload directly; no temporary file is needed
+    files = {"file": (file.name, file.getvalue(), getattr(file, "type", None) or "application/octet-stream")}
+    data = {"title": title}
+    response = _SESSION.post(
+        f"{API_BASE_URL}/documents/upload",
+        files=files,
+        data=data,
+        timeout=UPLOAD_TIMEOUT
+    )
+    
+    if response.status_code != 200:
+        raise RuntimeError(response.text)
+    return response.json()
+
+def upload_documents(files, title=None):
+    """Upload several documents to the API concurrently"""
+    progress = st.progress(0.0)
+    results = []
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = {
+            executor.submit(_post_document, file, title if len(files) == 1 and title else file.name): file
+            for file in files
+        }
+        # Status messages are rendered here, on the script thread
+        for done, future in enumerate(as_completed(futures), start=1):
+            name = futures[future].name
+            try:
+                results.append(future.result())
+                st.success(f"Document uploaded successfully: {name}")
+            except Exception as e:
+                st.error(f"Error uploading document {name}: {str(e)}")
+            progress.progress(done / len(files))
+    
+    if results:
+        # Fetch updated document list
+        _get_documents.clear()
+        fetch_documents()
+    return results
 
 def delete_document(document_id):
     """Delete a document from the API"""
     try:
-        response = requests.delete(
+        response = _SESSION.delete(
             f"{API_BASE_URL}/documents/{document_id}"
         )
         if response.status_code == 200:
             st.success("Document deleted successfully")
+            _get_documents.clear()
             fetch_documents()
         else:
             st.error(f"Error deleting document: {response.text}")
     except Exception as e:
         st.error(f"Error deleting document: {str(e)}")
 
-def query_documents(query):
-    """Query documents using the API"""
+def stream_query_documents(query, meta):
+    """Stream an answer from the API, yielding text deltas and filling meta with sources/cached"""
+    payload = {
+        "query": query,
+        "conversation_id": st.session_state.conversation_id,
+        "k": st.session_state.retrieval_k
+    }
     try:
-        payload = {
-            "query": query,
-            "conversation_id": st.session_state.conversation_id,
-            "k": st.session_state.retrieval_k
-        }
-        response = requests.post(
-            f"{API_BASE_URL}/query",
-            json=payload
-        )
-        if response.status_code == 200:
-            return response.json()
-        else:
-            st.error(f"Error querying documents: {response.text}")
-            return {"answer": "Error querying documents", "sources": []}
+        with _SESSION.post(f"{API_BASE_URL}/query/stream", json=payload, stream=True) as response:
+            if response.status_code != 200:
+                st.error(f"Error querying documents: {response.text}")
+                yield "Error querying documents"
+                return
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data: "):
+                    continue
+                frame = json.loads(line[6:])
+                if "sources" in frame:
+                    meta["sources"] = frame["sources"]
+                    meta["cached"] = frame.get("cached", False)
+                if frame.get("delta"):
+                    yield frame["delta"]
+        _get_conversation_history.clear()
     except Exception as e:
         st.error(f"Error querying documents: {str(e)}")
-        return {"answer": f"Error: {str(e)}", "sources": []}
+        yield f"Error: {str(e)}"
+
+# Bounded: hits are mostly reloads replaying the same server history
+@st.cache_data(ttl=3600, show_spinner=False, max_entries=64)
+def _summarize_messages(messages):
+    """Summarize messages via the API, raising on API errors so failures are not cached"""
+    response = _SESSION.post(
+        f"{API_BASE_URL}/conversation/summarize",
+        json={"messages": messages},
+        timeout=SUMMARIZE_TIMEOUT
+    )
+    if response.status_code != 200:
+        raise RuntimeError(response.text)
+    return response.json()["summary"]
+
+def _fallback_summary(messages):
+    """Keep the earlier summary and the questions asked when the API cannot summarize"""
+    lines = [m["content"] for m in messages if m["type"] == "summary"]
+    lines += [f"- {m['content']}" for m in messages if m["type"] == "human"]
+    return "\n".join(lines)
+
+def compact_messages():
+    """Fold the oldest chat messages into the running summary until under the cap"""
+    while len(st.session_state.messages) > MAX_CHAT_MESSAGES:
+        messages = st.session_state.messages
+        head = messages[:SUMMARIZE_CHAT_MESSAGES]
+        if st.session_state.messages_summary:
+            head = [{"type": "summary", "content": st.session_state.messages_summary}] + head
+        # Only type/content are summarized; sources are dropped with the old turns
+        head = [{"type": m.get("type", "bot"), "content": m.get("content", "")} for m in head]
+        try:
+            st.session_state.messages_summary = _summarize_messages(head)
+        except Exception:
+            st.session_state.messages_summary = _fallback_summary(head)
+        st.session_state.messages = messages[SUMMARIZE_CHAT_MESSAGES:]
 
 def clear_conversation():
     """Clear the current conversation"""
     try:
-        response = requests.delete(
+        response = _SESSION.delete(
             f"{API_BASE_URL}/conversation/{st.session_state.conversation_id}"
         )
         if response.status_code == 200:
+            _get_conversation_history.clear()
             st.session_state.messages = []
+            st.session_state.messages_summary = ""
             st.session_state.conversation_id = str(uuid.uuid4())
+            st.session_state._history_loaded = False
             st.success("Conversation cleared")
         else:
             st.error(f"Error clearing conversation: {response.text}")
@@ -161,13 +245,13 @@ def render_sidebar():
     
     # Document upload section
     st.sidebar.header("Upload Documents")
-    uploaded_file = st.sidebar.file_uploader("Choose a document", type=["pdf", "docx", "pptx", "ppt", "xlsx", "xls", "html", "htm", "txt"])
-    doc_title = st.sidebar.text_input("Document Title (optional)")
+    uploaded_files = st.sidebar.file_uploader("Choose documents", type=UPLOAD_TYPES, accept_multiple_files=True)
+    doc_title = st.sidebar.text_input("Document Title (optional, single document only)")
     
-    if uploaded_file is not None:
-        if st.sidebar.button("Upload Document"):
-            with st.sidebar.status("Uploading document..."):
-                result = upload_document(uploaded_file, doc_title or uploaded_file.name)
+    if uploaded_files:
+        if st.sidebar.button("Upload Documents"):
+            with st.sidebar.status("Uploading documents..."):
+                result = upload_documents(uploaded_files, doc_title)
                 if result:
                     time.sleep(1)  # Give user time to see the success message
                     st.rerun()
@@ -209,6 +293,14 @@ def render_sidebar():
         """)
 
 # Main app components
+def _render_sources(sources):
+    """Render the sources expander for an assistant message"""
+    if sources:
+        with st.expander("Sources"):
+            for i, source in enumerate(sources):
+                st.markdown(f"**Source {i+1}:** {source.get('title', 'Unknown')} (Page {source.get('page', 'N/A')})")
+                st.text(source.get('snippet', ''))
+
 def render_chat_tab():
     """Render the chat interface tab"""
     st.header("Document Q&A")
@@ -216,34 +308,12 @@ def render_chat_tab():
     # Create a container for the chat history that will scroll
     chat_container = st.container()
     
-    # Create a container for the input box that will stay fixed at the bottom
-    input_container = st.container()
-    
-    # Handle input in the fixed container at the bottom
-    with input_container:
-        query = st.chat_input("Ask a question about your documents...")
-        if query:
-            # Add to session state
-            st.session_state.messages.append({"type": "human", "content": query})
-            
-            # Query the API
-            with st.status("Thinking..."):
-                result = query_documents(query)
-                answer = result.get("answer", "I couldn't find an answer to your question.")
-                sources = result.get("sources", [])
-            
-            # Add AI response to session state
-            st.session_state.messages.append({
-                "type": "bot", 
-                "content": answer,
-                "sources": sources
-            })
-            
-            # Force a rerun to update the chat history
-            st.rerun()
-    
     # Display conversation history in the scrollable container
     with chat_container:
+        if st.session_state.messages_summary:
+            with st.expander("Earlier conversation (summary)"):
+                st.markdown(st.session_state.messages_summary)
+        
         for message in st.session_state.messages:
             role = message.get("type", "bot")
             content = message.get("content", "")
@@ -253,14 +323,41 @@ def render_chat_tab():
             else:
                 with st.chat_message("assistant"):
                     st.write(content)
+                    if message.get("cached"):
+                        st.caption("(cached)")
                     
                     # Display sources if available
-                    sources = message.get("sources", [])
-                    if sources:
-                        with st.expander("Sources"):
-                            for i, source in enumerate(sources):
-                                st.markdown(f"**Source {i+1}:** {source.get('title', 'Unknown')} (Page {source.get('page', 'N/A')})")
-                                st.text(source.get('snippet', ''))
+                    _render_sources(message.get("sources", []))
+    
+    # Handle input in the fixed box at the bottom; new messages are appended
+    # to the live chat container instead of rerunning the whole script
+    query = st.chat_input("Ask a question about your documents...")
+    if query:
+        # Add to session state
+        st.session_state.messages.append({"type": "human", "content": query})
+        
+        with chat_container:
+            st.chat_message("user").write(query)
+            
+            # Stream the answer from the API as it is generated
+            meta = {"sources": [], "cached": False}
+            with st.chat_message("assistant"):
+                answer = st.write_stream(stream_query_documents(query, meta))
+                if not answer:
+                    answer = "I couldn't find an answer to your question."
+                    st.write(answer)
+                if meta["cached"]:
+                    st.caption("(cached)")
+                _render_sources(meta["sources"])
+        
+        # Add AI response to session state
+        st.session_state.messages.append({
+            "type": "bot", 
+            "content": answer,
+            "sources": meta["sources"],
+            "cached": meta["cached"]
+        })
+        compact_messages()
 
 def render_documents_tab():
     """Render the documents tab"""
@@ -268,6 +365,7 @@ def render_documents_tab():
     
     # Refresh button
     if st.button("Refresh Documents"):
+        _get_documents.clear()
         fetch_documents()
         st.rerun()
     
@@ -287,9 +385,17 @@ def render_documents_tab():
 
 # Main app
 def main():
-    # Fetch initial data
-    fetch_conversation_history()
-    fetch_documents()
+    # History is loaded once per conversation, after which local state is authoritative
+    if st.session_state.get("_history_loaded"):
+        fetch_documents()
+    else:
+        # Fetch initial data concurrently; session state is only touched on this thread.
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            history_future = executor.submit(_get_conversation_history, st.session_state.conversation_id)
+            documents_future = executor.submit(_get_documents)
+        # Only mark history loaded on success so a failed fetch is retried next run
+        st.session_state._history_loaded = _apply_conversation_history(history_future.result)
+        _apply_documents(documents_future.result)
     
     # Render sidebar
     render_sidebar()
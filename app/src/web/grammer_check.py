@@ -1,8 +1,15 @@
 import streamlit as st
 import os
 import sys
-import PyPDF2
+import httpx
 from io import StringIO
+from pypdf import PdfReader
+
+# PyMuPDF extracts text in C and is much faster than pypdf; use it when present
+try:
+    import fitz
+except ImportError:
+    fitz = None
 
 # Add project root to Python path
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
@@ -27,21 +34,44 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-model = ChatOpenAI(
-    api_key=os.environ.get('OPENAI_API_KEY'),
-    model="gpt-4o-mini",
-    temperature=0,
-)
+# One client for the whole server process so its HTTP connection pool is
+# reused across reruns and sessions
+@st.cache_resource
+def _get_model():
+    return ChatOpenAI(
+        api_key=os.environ.get('OPENAI_API_KEY'),
+        model="gpt-4o-mini",
+        temperature=0,
+        max_retries=2,
+        timeout=60,
+        http_client=httpx.Client(
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+        ),
+    )
+
+model = _get_model()
+
+# The prompts are module constants, so each chain is built once and reused
+# across reruns
+@st.cache_resource(max_entries=32)
+def _chain_for(prompt):
+    prompt_template = PromptTemplate(
+        template=prompt,
+        input_variables=["context", "word_count", "role"] if "context" in prompt else ["context", "voice_conversion"],
+    )
+
+    return prompt_template | model
+
+# Identical prompt + inputs yield identical output at temperature 0, so answers
+# are cached by content for an hour (bounded to 512 entries)
+@st.cache_data(ttl=3600, max_entries=512, show_spinner=False)
+def _invoke_prompt(prompt, input_vars):
+    result = _chain_for(prompt).invoke(input_vars)
+    
+    return result.content
 
 def run_task(prompt, text, **kwargs):
     try:
-        prompt_template = PromptTemplate(
-            template=prompt,
-            input_variables=["context", "word_count", "role"] if "context" in prompt else ["context", "voice_conversion"],
-        )
-
-        chain = prompt_template | model
-
         input_vars = {
             'context': text,
             'word_count': st.session_state.get('word_count', None),
@@ -50,55 +80,39 @@ def run_task(prompt, text, **kwargs):
             **kwargs
         }
         
-        result = chain.invoke(input_vars)
-        
-        return result.content
+        return _invoke_prompt(prompt, input_vars)
     except Exception as e:
         return f"Error: {str(e)}"
 
+def _extract_pdf_text(file):
+    if fitz is not None:
+        with fitz.open(stream=file.read(), filetype="pdf") as doc:
+            return "".join(page.get_text() for page in doc)
+    pdf_reader = PdfReader(file)
+    return "".join(page.extract_text() or "" for page in pdf_reader.pages)
+
+def _read_as_text(text_or_file):
+    if isinstance(text_or_file, str):
+        return text_or_file
+    if not hasattr(text_or_file, 'type'):
+        raise ValueError("Invalid input. Please provide text or a file.")
+    if text_or_file.type == "text/plain":
+        return text_or_file.read().decode("utf-8")
+    if text_or_file.type == "application/pdf":
+        return _extract_pdf_text(text_or_file)
+    raise ValueError("Unsupported file type. Please upload a text or PDF file.")
+
 def plagiarism_check(text_or_file):
     try:
-        if isinstance(text_or_file, str):
-            text = text_or_file
-        elif hasattr(text_or_file, 'type'):
-            if text_or_file.type == "text/plain":
-                text = text_or_file.read().decode("utf-8")
-            elif text_or_file.type == "application/pdf":
-                pdf_reader = PyPDF2.PdfReader(text_or_file)
-                text = ""
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    text += page.extract_text()
-            else:
-                return "Error: Unsupported file type. Please upload a text or PDF file."
-        else:
-            return "Error: Invalid input. Please provide text or a file."
-
-        output = run_task(PLAGIARISM_PROMPT, text)
-        return output
+        text = _read_as_text(text_or_file)
+        return run_task(PLAGIARISM_PROMPT, text)
     except Exception as e:
         return f"Error: {str(e)}"
 
 def detect_ai_generated_content(text_or_file):
     try:
-        if isinstance(text_or_file, str):
-            text = text_or_file
-        elif hasattr(text_or_file, 'type'):
-            if text_or_file.type == "text/plain":
-                text = text_or_file.read().decode("utf-8")
-            elif text_or_file.type == "application/pdf":
-                pdf_reader = PyPDF2.PdfReader(text_or_file)
-                text = ""
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    text += page.extract_text()
-            else:
-                return "Error: Unsupported file type. Please upload a text or PDF file."
-        else:
-            return "Error: Invalid input. Please provide text or a file."
-
-        output = run_task(AI_DETECTION_PROMPT, text)
-        return output
+        text = _read_as_text(text_or_file)
+        return run_task(AI_DETECTION_PROMPT, text)
     except Exception as e:
         return f"Error: {str(e)}"
 
@@ -119,27 +133,20 @@ def evaluate_essay(essay, achievements, degree_program, college_name):
 
 st.title("Chatbot 🤖")
 
-if 'user_input' not in st.session_state:
-    st.session_state['user_input'] = ""
-
-if 'word_count' not in st.session_state:
-    st.session_state['word_count'] = None
-
-if 'role' not in st.session_state:
-    st.session_state['role'] = None
-
-if 'achievements' not in st.session_state:
-    st.session_state['achievements'] = {
+_SESSION_DEFAULTS = {
+    'user_input': "",
+    'word_count': None,
+    'role': None,
+    'achievements': {
         'academic_achievement': '',
         'professional_achievement': '',
         'international_experience': ''
-    }
-
-if 'degree_program' not in st.session_state:
-    st.session_state['degree_program'] = ''
-
-if 'college_name' not in st.session_state:
-    st.session_state['college_name'] = ''
+    },
+    'degree_program': '',
+    'college_name': '',
+}
+for key, value in _SESSION_DEFAULTS.items():
+    st.session_state.setdefault(key, value)
 
 user_input = st.text_area("Enter your text here:", value=st.session_state['user_input'], height=200)
 
@@ -1,75 +1,288 @@
 import streamlit as st
 import requests
-import json
-import time
-from PIL import Image
-import io
-import base64
-from typing import Dict, Any, Optional
+import os
+import sys
+from typing import Dict, Any
+
+# Add project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
+sys.path.insert(0, project_root)
+
+from app.src.core.adaptive_limiter import AdaptiveLimiter, LimiterTimeout
+from app.src.core.http_session import make_http_session
+from app.src.core import json_utils
 
 # API configuration
 API_URL = "https://trt-demo-ai-bots.demotrt.com"
 TIMEOUT = 10  # seconds
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Custom CSS for better UI
+_CSS = """
+<style>
+.main-header {
+    font-size: 2.5rem;
+    color: #1E3A8A;
+    margin-bottom: 1rem;
+}
+.sub-header {
+    font-size: 1.5rem;
+    color: #2563EB;
+    margin-bottom: 1rem;
+}
+.info-text {
+    font-size: 1rem;
+    color: #4B5563;
+}
+.highlight {
+    background-color: #DBEAFE;
+    padding: 1rem;
+    border-radius: 0.5rem;
+    margin-bottom: 1rem;
+}
+.stButton > button {
+    width: 100%;
+}
+</style>
+"""
+
+@st.cache_resource
+def _get_http_session():
+    """Shared HTTP session so keep-alive connections survive Streamlit reruns"""
+    return make_http_session(retry_post=True)
+
+@st.cache_resource
+def _get_limiter():
+    """Limiter shared by every session of this app, so all tabs back off together"""
+    return AdaptiveLimiter(initial=2, maximum=8)
 
 def check_api_connection() -> bool:
     """Check if the API is running."""
     try:
-        response = requests.get(f"{API_URL}/api/interior-design/health", timeout=TIMEOUT)
+        response = _get_http_session().get(f"{API_URL}/api/interior-design/health", timeout=TIMEOUT)
         return response.status_code == 200
     except:
         return False
 
+def _set_api_ok(ok: bool) -> None:
+    """Record whether the last real API request reached the server."""
+    if st.session_state.get("api_ok", True) != ok:
+        # The sidebar is outside the step fragments, so it needs a full rerun to redraw
+        st.session_state.api_ok_changed = True
+    st.session_state.api_ok = ok
+
+def _show_step_error(message: str) -> None:
+    """Show a step error, rerunning the whole app first if the API status changed."""
+    if st.session_state.pop("api_ok_changed", False):
+        st.session_state.step_error = message
+        st.rerun()
+    st.error(message)
+
+def _rerun_step() -> None:
+    """Rerun the current step, or the whole app if the API status changed."""
+    st.rerun(scope="app" if st.session_state.pop("api_ok_changed", False) else "fragment")
+
+class _UncachedResult(Exception):
+    """Carries an unsuccessful API result out of a cached call so it is not cached."""
+    def __init__(self, result: Dict[str, Any]):
+        super().__init__(result.get("error", "Unknown error"))
+        self.result = result
+
+def _post(path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """POST a JSON payload to the API through the shared limiter."""
+    response = _get_limiter().run(lambda: _get_http_session().post(
+        f"{API_URL}{path}",
+        data=json_utils.dumps(payload),
+        headers=JSON_HEADERS,
+        timeout=60  # Longer timeout for image generation and cost estimation
+    ))
+    return json_utils.loads(response.content)
+
+@st.cache_data(ttl=3600, show_spinner=False, max_entries=128)
+def _post_cached(path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """POST to the API, caching successful results for identical payloads."""
+    result = _post(path, payload)
+    if result.get("status") != "success":
+        raise _UncachedResult(result)
+    return result
+
 def generate_design_image(room_type: str, style: str, requirements: str) -> Dict[str, Any]:
     """Generate an interior design image."""
+    # Not cached: each press should give a new design, and the image URLs expire
     try:
-        response = requests.post(
-            f"{API_URL}/api/interior-design/generate-image",
-            json={
+        result = _post(
+            "/api/interior-design/generate-image",
+            {
                 "room_type": room_type,
                 "style": style,
                 "requirements": requirements
-            },
-            timeout=60  # Longer timeout for image generation
+            }
         )
-        return response.json()
+        _set_api_ok(True)
+        return result
+    except LimiterTimeout as e:
+        # Local queueing says nothing about whether the API is up; the step shows the message
+        return {"status": "error", "error": str(e)}
     except Exception as e:
+        _set_api_ok(not isinstance(e, requests.exceptions.RequestException))
         st.error(f"Error generating design image: {str(e)}")
         return {"status": "error", "error": str(e)}
 
 def modify_design_image(image_url: str, modifications: str) -> Dict[str, Any]:
     """Modify an interior design image."""
     try:
-        response = requests.post(
+        response = _get_limiter().run(lambda: _get_http_session().post(
             f"{API_URL}/api/interior-design/modify-image",
-            json={
+            data=json_utils.dumps({
                 "image_url": image_url,
                 "modifications": modifications
-            },
+            }),
+            headers=JSON_HEADERS,
             timeout=60  # Longer timeout for image modification
-        )
-        return response.json()
+        ))
+        _set_api_ok(True)
+        return json_utils.loads(response.content)
+    except LimiterTimeout as e:
+        # Local queueing says nothing about whether the API is up; the step shows the message
+        return {"status": "error", "error": str(e)}
     except Exception as e:
+        _set_api_ok(not isinstance(e, requests.exceptions.RequestException))
         st.error(f"Error modifying design image: {str(e)}")
         return {"status": "error", "error": str(e)}
 
 def estimate_cost(image_url: str, room_type: str, style: str, requirements: str) -> Dict[str, Any]:
     """Estimate the cost of implementing a design."""
     try:
-        response = requests.post(
-            f"{API_URL}/api/interior-design/estimate-cost",
-            json={
+        result = _post_cached(
+            "/api/interior-design/estimate-cost",
+            {
                 "image_url": image_url,
                 "room_type": room_type,
                 "style": style,
                 "requirements": requirements
-            },
-            timeout=60  # Longer timeout for cost estimation
+            }
         )
-        return response.json()
+        _set_api_ok(True)
+        return result
+    except _UncachedResult as e:
+        _set_api_ok(True)
+        return e.result
+    except LimiterTimeout as e:
+        # Local queueing says nothing about whether the API is up; the step shows the message
+        return {"status": "error", "error": str(e)}
     except Exception as e:
+        _set_api_ok(not isinstance(e, requests.exceptions.RequestException))
         st.error(f"Error estimating cost: {str(e)}")
         return {"status": "error", "error": str(e)}
 
+@st.fragment
+def _step_generate():
+    """Step 1: generate the initial design image."""
+    st.markdown('<h2 class="sub-header">Step 1: Generate Interior Design Image</h2>', unsafe_allow_html=True)
+    
+    with st.form("design_form"):
+        room_type = st.selectbox(
+            "Room Type",
+            options=["Living Room", "Bedroom", "Kitchen", "Bathroom", "Home Office", "Dining Room", "Outdoor Space"]
+        )
+        
+        style = st.selectbox(
+            "Design Style",
+            options=["Modern", "Contemporary", "Minimalist", "Traditional", "Industrial", "Scandinavian", "Bohemian", "Mid-Century Modern", "Rustic", "Coastal"]
+        )
+        
+        requirements = st.text_area(
+            "Specific Requirements",
+            placeholder="Describe your requirements, e.g., 'I need a space for a home theater setup, with comfortable seating for 5 people, and storage for books.'"
+        )
+        
+        generate_button = st.form_submit_button("Generate Design Image")
+    
+    # Always send the request; its outcome is what updates api_ok
+    if generate_button:
+        with st.spinner("Generating interior design image..."):
+            result = generate_design_image(room_type, style, requirements)
+            
+            if result["status"] == "success":
+                st.session_state.design_image_url = result["image_url"]
+                st.session_state.room_type = room_type
+                st.session_state.style = style
+                st.session_state.requirements = requirements
+                # The page switches to the later steps, so rerun the whole app
+                st.rerun()
+            else:
+                _show_step_error(f"Error: {result.get('error', 'Unknown error')}")
+
+@st.fragment
+def _step_modify():
+    """Show the current design and apply modifications to it."""
+    # Display the current design image
+    st.markdown('<h2 class="sub-header">Your Interior Design</h2>', unsafe_allow_html=True)
+    st.image(st.session_state.design_image_url, caption="Interior Design", use_container_width=True)
+    
+    # Step 2: Modify Design Image
+    st.markdown('<h2 class="sub-header">Step 2: Modify Design (Optional)</h2>', unsafe_allow_html=True)
+    
+    with st.expander("Make modifications to your design", expanded=True):
+        modifications = st.text_area(
+            "Describe the modifications you want to make",
+            placeholder="E.g., 'Change the wall color to blue, add more plants, replace the sofa with a sectional'"
+        )
+        
+        col1, col2 = st.columns([1, 1])
+        with col1:
+            if st.button("Apply Modifications"):
+                with st.spinner("Applying modifications..."):
+                    result = modify_design_image(st.session_state.design_image_url, modifications)
+                    
+                    if result["status"] == "success":
+                        st.session_state.design_image_url = result["image_url"]
+                        _rerun_step()
+                    else:
+                        _show_step_error(f"Error: {result.get('error', 'Unknown error')}")
+        with col2:
+            if st.button("Start Over"):
+                st.session_state.design_image_url = None
+                st.session_state.cost_estimate = None
+                st.rerun()
+
+@st.fragment
+def _step_cost():
+    """Step 3: estimate the cost of the current design."""
+    st.markdown('<h2 class="sub-header">Step 3: Get Cost Estimate</h2>', unsafe_allow_html=True)
+    
+    if st.session_state.cost_estimate is None:
+        if st.button("Generate Cost Estimate"):
+            with st.spinner("Estimating cost..."):
+                result = estimate_cost(
+                    st.session_state.design_image_url,
+                    st.session_state.room_type,
+                    st.session_state.style,
+                    st.session_state.requirements
+                )
+                
+                if result["status"] == "success":
+                    st.session_state.cost_estimate = result["cost_estimate"]
+                    _rerun_step()
+                else:
+                    _show_step_error(f"Error: {result.get('error', 'Unknown error')}")
+    else:
+        # Display cost estimate
+        st.markdown('<div class="highlight">', unsafe_allow_html=True)
+        st.markdown("### Cost Breakdown")
+        st.markdown(st.session_state.cost_estimate)
+        st.markdown('</div>', unsafe_allow_html=True)
+        
+        # Save and share options
+        st.markdown("### Save or Share Your Design")
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("Save Design"):
+                st.success("Design saved successfully! (Demo only)")
+        with col2:
+            if st.button("Share Design"):
+                st.success("Design shared successfully! (Demo only)")
+
 def main():
     st.set_page_config(
         page_title="Interior Design Assistant",
@@ -78,43 +291,20 @@ def main():
         initial_sidebar_state="expanded"
     )
     
-    # Custom CSS for better UI
-    st.markdown("""
-    <style>
-    .main-header {
-        font-size: 2.5rem;
-        color: #1E3A8A;
-        margin-bottom: 1rem;
-    }
-    .sub-header {
-        font-size: 1.5rem;
-        color: #2563EB;
-        margin-bottom: 1rem;
-    }
-    .info-text {
-        font-size: 1rem;
-        color: #4B5563;
-    }
-    .highlight {
-        background-color: #DBEAFE;
-        padding: 1rem;
-        border-radius: 0.5rem;
-        margin-bottom: 1rem;
-    }
-    .stButton > button {
-        width: 100%;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    # Emitted on every full run: Streamlit drops elements a rerun does not redraw
+    st.markdown(_CSS, unsafe_allow_html=True)
+    
+    # A full run redraws the sidebar status, so any pending change is now shown
+    st.session_state.pop("api_ok_changed", None)
     
     # Sidebar for API connection status
     with st.sidebar:
         st.title("Interior Design Assistant")
         st.markdown("---")
         
-        # API connection status
+        # API connection status, taken from the outcome of the last real request
         st.subheader("API Connection")
-        api_status = check_api_connection()
+        api_status = st.session_state.get("api_ok", True)
         
         if api_status:
             st.success("✅ Connected to API")
@@ -124,6 +314,7 @@ def main():
             
             if st.button("Check API Connection"):
                 if check_api_connection():
+                    _set_api_ok(True)
                     st.success("✅ Connected to API")
                     st.rerun()
                 else:
@@ -156,109 +347,17 @@ def main():
     if "cost_estimate" not in st.session_state:
         st.session_state.cost_estimate = None
     
+    # Error from a step that triggered a full rerun to update the sidebar
+    step_error = st.session_state.pop("step_error", None)
+    if step_error:
+        st.error(step_error)
+    
     # Main workflow
     if st.session_state.design_image_url is None:
-        # Step 1: Generate Design Image
-        st.markdown('<h2 class="sub-header">Step 1: Generate Interior Design Image</h2>', unsafe_allow_html=True)
-        
-        with st.form("design_form"):
-            room_type = st.selectbox(
-                "Room Type",
-                options=["Living Room", "Bedroom", "Kitchen", "Bathroom", "Home Office", "Dining Room", "Outdoor Space"]
-            )
-            
-            style = st.selectbox(
-                "Design Style",
-                options=["Modern", "Contemporary", "Minimalist", "Traditional", "Industrial", "Scandinavian", "Bohemian", "Mid-Century Modern", "Rustic", "Coastal"]
-            )
-            
-            requirements = st.text_area(
-                "Specific Requirements",
-                placeholder="Describe your requirements, e.g., 'I need a space for a home theater setup, with comfortable seating for 5 people, and storage for books.'"
-            )
-            
-            generate_button = st.form_submit_button("Generate Design Image")
-        
-        if generate_button and api_status:
-            with st.spinner("Generating interior design image..."):
-                result = generate_design_image(room_type, style, requirements)
-                
-                if result["status"] == "success":
-                    st.session_state.design_image_url = result["image_url"]
-                    st.session_state.room_type = room_type
-                    st.session_state.style = style
-                    st.session_state.requirements = requirements
-                    st.rerun()
-                else:
-                    st.error(f"Error: {result.get('error', 'Unknown error')}")
-        elif generate_button and not api_status:
-            st.error("Cannot generate design: API not connected")
-    
+        _step_generate()
     else:
-        # Display the current design image
-        st.markdown('<h2 class="sub-header">Your Interior Design</h2>', unsafe_allow_html=True)
-        st.image(st.session_state.design_image_url, caption="Interior Design", use_container_width=True)
-        
-        # Step 2: Modify Design Image
-        st.markdown('<h2 class="sub-header">Step 2: Modify Design (Optional)</h2>', unsafe_allow_html=True)
-        
-        with st.expander("Make modifications to your design", expanded=True):
-            modifications = st.text_area(
-                "Describe the modifications you want to make",
-                placeholder="E.g., 'Change the wall color to blue, add more plants, replace the sofa with a sectional'"
-            )
-            
-            col1, col2 = st.columns([1, 1])
-            with col1:
-                if st.button("Apply Modifications") and api_status:
-                    with st.spinner("Applying modifications..."):
-                        result = modify_design_image(st.session_state.design_image_url, modifications)
-                        
-                        if result["status"] == "success":
-                            st.session_state.design_image_url = result["image_url"]
-                            st.rerun()
-                        else:
-                            st.error(f"Error: {result.get('error', 'Unknown error')}")
-            with col2:
-                if st.button("Start Over"):
-                    st.session_state.design_image_url = None
-                    st.session_state.cost_estimate = None
-                    st.rerun()
-        
-        # Step 3: Cost Estimation
-        st.markdown('<h2 class="sub-header">Step 3: Get Cost Estimate</h2>', unsafe_allow_html=True)
-        
-        if st.session_state.cost_estimate is None:
-            if st.button("Generate Cost Estimate") and api_status:
-                with st.spinner("Estimating cost..."):
-                    result = estimate_cost(
-                        st.session_state.design_image_url,
-                        st.session_state.room_type,
-                        st.session_state.style,
-                        st.session_state.requirements
-                    )
-                    
-                    if result["status"] == "success":
-                        st.session_state.cost_estimate = result["cost_estimate"]
-                        st.rerun()
-                    else:
-                        st.error(f"Error: {result.get('error', 'Unknown error')}")
-        else:
-            # Display cost estimate
-            st.markdown('<div class="highlight">', unsafe_allow_html=True)
-            st.markdown("### Cost Breakdown")
-            st.markdown(st.session_state.cost_estimate)
-            st.markdown('</div>', unsafe_allow_html=True)
-            
-            # Save and share options
-            st.markdown("### Save or Share Your Design")
-            col1, col2 = st.columns(2)
-            with col1:
-                if st.button("Save Design"):
-                    st.success("Design saved successfully! (Demo only)")
-            with col2:
-                if st.button("Share Design"):
-                    st.success("Design shared successfully! (Demo only)")
+        _step_modify()
+        _step_cost()
 
 if __name__ == "__main__":
     main()
@@ -1,9 +1,16 @@
 import streamlit as st
 import requests
-import json
 import os
+import sys
 from dotenv import load_dotenv
 
+# Add project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
+sys.path.insert(0, project_root)
+
+from app.src.core.http_session import make_http_session
+from app.src.core import json_utils
+
 # Load environment variables
 load_dotenv()
 
@@ -15,24 +22,37 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+@st.cache_resource
+def _get_http_session():
+    """Shared HTTP session so keep-alive connections survive Streamlit reruns"""
+    return make_http_session(retry_post=True)
+
+@st.cache_data(ttl=3600, show_spinner=False, max_entries=128)
+def _consult(question):
+    """POST a question to the API; HTTP errors raise and are not cached"""
+    response = _get_http_session().post(
+        "https://trt-demo-ai-bots.demotrt.com/api/medical-bot/consult",
+        data=json_utils.dumps({"question": question}),
+        headers={"Content-Type": "application/json"},
+        timeout=(3, 60)  # connect, read
+    )
+    response.raise_for_status()  # Raise an exception for HTTP errors
+    
+    # Parse the JSON response properly
+    try:
+        # First try to parse as JSON
+        result = json_utils.loads(response.content)
+        return result.get("answer", "Error: Unable to parse response")
+    except json_utils.JSONDecodeError:
+        # If not JSON, return the raw text with quotes stripped; decoding the
+        # bytes directly skips the charset detection behind response.text
+        return response.content.decode("utf-8", errors="replace").strip('"')
+
 # Function to call the API
 def get_medical_response(question):
     """Call the FastAPI backend to get a response for the medical question"""
     try:
-        response = requests.post(
-            "https://trt-demo-ai-bots.demotrt.com/api/medical-bot/consult",
-            json={"question": question}
-        )
-        response.raise_for_status()  # Raise an exception for HTTP errors
-        
-        # Parse the JSON response properly
-        try:
-            # First try to parse as JSON
-            result = response.json()
-            return result.get("answer", "Error: Unable to parse response")
-        except json.JSONDecodeError:
-            # If not JSON, return the raw text with quotes stripped
-            return response.text.strip('"')
+        return _consult(question)
     except requests.exceptions.RequestException as e:
         st.error(f"Error connecting to API: {str(e)}")
         return None
@@ -1,11 +1,22 @@
 import streamlit as st
+from streamlit.runtime.uploaded_file_manager import UploadedFile
 import requests
-import json
 import os
+import sys
 import uuid
-from PIL import Image
+import io
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageOps
 import logging
 
+# Add project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
+sys.path.insert(0, project_root)
+
+from app.src.core.adaptive_limiter import AdaptiveLimiter, LimiterTimeout
+from app.src.core.http_session import make_http_session
+from app.src.core import json_utils
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, 
                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -20,41 +31,105 @@ logger.addHandler(file_handler)
 
 # API URL
 API_URL = os.getenv("API_URL", "http://127.0.0.1:8000/api")
+JSON_HEADERS = {"Content-Type": "application/json"}
+QUERY_TIMEOUT = (5, 600)  # (connect, read): OCR plus the LLM over several images can take minutes
+
+@st.cache_resource
+def _get_http_session():
+    """Shared HTTP session so keep-alive connections survive Streamlit reruns"""
+    return make_http_session(retry_post=True)
 
 def check_api_connection():
     """Check if the API server is running and accessible."""
     try:
-        response = requests.get(f"{API_URL}/menu-extraction/health", timeout=5)
+        response = _get_http_session().get(f"{API_URL}/menu-extraction/health", timeout=5)
         return response.status_code == 200
     except requests.exceptions.RequestException:
         return False
 
+@st.cache_resource
+def _get_limiter():
+    """Limiter shared by every session of this app, so all tabs back off together"""
+    return AdaptiveLimiter(initial=2, maximum=8)
+
+MAX_IMAGE_EDGE = 2048  # Longest edge, in pixels, of uploaded menu images
+JPEG_QUALITY = 80
+THUMBNAIL_EDGE = 512  # Longest edge, in pixels, of the preview grid images
+
+def _hash_uploaded_file(file):
+    # file_id is stable for an upload across reruns, so no need to hash the bytes
+    return file.file_id
+
+@st.cache_data(show_spinner=False, max_entries=64, hash_funcs={UploadedFile: _hash_uploaded_file})
+def _shrink_image(file, max_edge=MAX_IMAGE_EDGE):
+    """Downscale an image to max_edge on its longest side and re-encode it as JPEG."""
+    image = Image.open(io.BytesIO(file.getvalue()))
+    # Apply the EXIF rotation first; re-encoding drops the orientation tag
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+    if image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info:
+        # JPEG has no alpha; flatten onto white so transparent areas don't turn black
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    buffer = io.BytesIO()
+    image.convert("RGB").save(buffer, "JPEG", quality=JPEG_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+class _UploadError(Exception):
+    """Raised from the cached upload so failed uploads are not cached."""
+
+@st.cache_data(
+    ttl=3600,
+    show_spinner=False,
+    max_entries=32,
+    hash_funcs={UploadedFile: _hash_uploaded_file}
+)
+def _upload_images_cached(files):
+    """Upload images once per distinct set of file contents."""
+    # Upload downscaled JPEG copies; phone photos are far larger than needed
+    files_to_upload = [
+        ("files", (f"{os.path.splitext(file.name)[0]}.jpg", _shrink_image(file), "image/jpeg"))
+        for file in files
+    ]
+    
+    # Log the request
+    logger.info(f"Uploading {len(files)} images to {API_URL}/menu-extraction/upload-images")
+    
+    # Upload images
+    response = _get_limiter().run(lambda: _get_http_session().post(
+        f"{API_URL}/menu-extraction/upload-images",
+        files=files_to_upload,
+        timeout=30
+    ))
+    
+    # Log the response
+    if response.status_code == 200:
+        result = json_utils.loads(response.content)
+        logger.info("Upload successful. Response: %s", result)
+        return result
+    logger.error(f"Upload failed. Status code: {response.status_code}. Response: {response.text}")
+    raise _UploadError(response.text)
+
+def _set_api_ok(ok):
+    """Record whether the last real API request reached the server."""
+    st.session_state.api_ok = ok
+
 def upload_images(files):
     """Upload images to the API and get their URLs."""
     try:
-        # Prepare files for upload
-        files_to_upload = [("files", (file.name, file.getvalue(), file.type)) for file in files]
-        
-        # Log the request
-        logger.info(f"Uploading {len(files)} images to {API_URL}/menu-extraction/upload-images")
-        
-        # Upload images
-        response = requests.post(
-            f"{API_URL}/menu-extraction/upload-images",
-            files=files_to_upload,
-            timeout=30
-        )
-        
-        # Log the response
-        if response.status_code == 200:
-            result = response.json()
-            logger.info(f"Upload successful. Response: {json.dumps(result)}")
-            return result
-        else:
-            logger.error(f"Upload failed. Status code: {response.status_code}. Response: {response.text}")
-            return {"status": "error", "error": response.text}
+        result = _upload_images_cached(files)
+        _set_api_ok(True)
+        return result
+    except LimiterTimeout as e:
+        # Local queueing says nothing about whether the API is up
+        logger.warning(f"Upload not sent: {str(e)}")
+        return {"status": "error", "error": str(e)}
     except Exception as e:
-        logger.error(f"Error uploading images: {str(e)}")
+        _set_api_ok(not isinstance(e, requests.exceptions.RequestException))
+        if not isinstance(e, _UploadError):
+            logger.error(f"Error uploading images: {str(e)}")
         return {"status": "error", "error": str(e)}
 
 def process_query(query, image_urls=None, session_id=None):
@@ -68,33 +143,49 @@ def process_query(query, image_urls=None, session_id=None):
         }
         
         # Log the request
-        logger.info(f"Processing query with API. Payload: {json.dumps(data)}")
+        logger.info("Processing query with API. Payload: %s", data)
         
         # Process query
-        response = requests.post(
+        response = _get_limiter().run(lambda: _get_http_session().post(
             f"{API_URL}/menu-extraction/process-query",
-            json=data,
-            # timeout=120  # Increase timeout to 120 seconds
-        )
+            data=json_utils.dumps(data),
+            headers=JSON_HEADERS,
+            timeout=QUERY_TIMEOUT
+        ))
+        
+        _set_api_ok(True)
         
         # Log the response
         if response.status_code == 200:
-            result = response.json()
-            logger.info(f"Query processing successful. Response=--------------------------------: {result}")
+            result = json_utils.loads(response.content)
+            logger.info("Query processing successful. Response=--------------------------------: %s", result)
             return result
         else:
             logger.error(f"Query processing failed. Status code: {response.status_code}. Response: {response.text}")
             return {"status": "error", "error": response.text}
+    except LimiterTimeout as e:
+        # Local queueing says nothing about whether the API is up
+        logger.warning(f"Query not sent: {str(e)}")
+        return {"status": "error", "error": str(e)}
     except requests.exceptions.Timeout:
+        _set_api_ok(False)
         logger.error("API request timed out")
         return {"status": "error", "error": "API request timed out"}
     except requests.exceptions.RequestException as e:
+        _set_api_ok(False)
         logger.error(f"Error processing query: {str(e)}")
         return {"status": "error", "error": str(e)}
     except Exception as e:
         logger.error(f"Error processing query: {str(e)}")
         return {"status": "error", "error": str(e)}
 
+def _load_thumbnail(image_file):
+    """Return (thumbnail bytes, None) or (None, error) for one uploaded image."""
+    try:
+        return _shrink_image(image_file, max_edge=THUMBNAIL_EDGE), None
+    except Exception as e:
+        return None, e
+
 def display_images(image_files):
     """Display uploaded images in a grid layout."""
     if not image_files:
@@ -104,18 +195,31 @@ def display_images(image_files):
     num_images = len(image_files)
     cols = min(3, num_images)  # Maximum 3 columns
     
+    # Decode new uploads in parallel (PIL releases the GIL); st calls stay on this thread
+    with ThreadPoolExecutor(max_workers=min(8, num_images)) as executor:
+        thumbnails = list(executor.map(_load_thumbnail, image_files))
+    
     # Create columns
     columns = st.columns(cols)
     
     # Display images in columns
-    for i, image_file in enumerate(image_files):
+    for i, (thumbnail, error) in enumerate(thumbnails):
         col_idx = i % cols
         with columns[col_idx]:
-            try:
-                image = Image.open(image_file)
-                st.image(image, caption=f"Menu Image {i+1}", use_container_width=True)
-            except Exception as e:
-                st.error(f"Error displaying image: {str(e)}")
+            if error is None:
+                # Cached preview bytes: no full-size decode or transfer per rerun
+                st.image(thumbnail, caption=f"Menu Image {i+1}", use_container_width=True)
+            else:
+                st.error(f"Error displaying image: {str(error)}")
+
+CHAT_HISTORY_TAIL = 30  # Messages always shown; older ones sit behind a toggle
+
+def _render_message(message):
+    """Render one chat history entry."""
+    if message["is_user"]:
+        st.chat_message("user").write(message["content"])
+    else:
+        st.chat_message("assistant").write(message["content"])
 
 def main():
     st.set_page_config(page_title="Menu Extraction Assistant", layout="wide")
@@ -123,8 +227,8 @@ def main():
     # App title
     st.title("Menu Extraction Assistant")
     
-    # Check API connection
-    api_available = check_api_connection()
+    # API availability comes from the outcome of the last real request
+    api_available = st.session_state.get("api_ok", True)
     
     # Sidebar
     with st.sidebar:
@@ -138,8 +242,10 @@ def main():
         
         if st.button("Check API Connection"):
             if check_api_connection():
+                _set_api_ok(True)
                 st.success("API is available!")
             else:
+                _set_api_ok(False)
                 st.error("API is not available. Please start the API server.")
                 st.code("python -m app.main", language="bash")
     
@@ -148,7 +254,10 @@ def main():
         st.session_state.chat_history = []
     
     if "session_id" not in st.session_state:
-        st.session_state.session_id = str(uuid.uuid4())
+        # Keep the id in the URL so a reload resumes the same backend session
+        session_id = st.query_params.get("session_id") or str(uuid.uuid4())
+        st.query_params["session_id"] = session_id
+        st.session_state.session_id = session_id
     
     # Main content area
     if not api_available:
@@ -158,12 +267,15 @@ def main():
     chat_tab, data_tab, text_tab = st.tabs(["Chat", "Menu Data", "Raw Text"])
     
     with chat_tab:
-        # Display chat history
-        for message in st.session_state.chat_history:
-            if message["is_user"]:
-                st.chat_message("user").write(message["content"])
-            else:
-                st.chat_message("assistant").write(message["content"])
+        # Display chat history; older turns are only rendered on request
+        history = st.session_state.chat_history
+        if len(history) > CHAT_HISTORY_TAIL:
+            # Fixed key: the label changes each turn and would otherwise reset the toggle
+            if st.toggle(f"Show {len(history) - CHAT_HISTORY_TAIL} older messages", key="show_older_messages"):
+                for message in history[:-CHAT_HISTORY_TAIL]:
+                    _render_message(message)
+        for message in history[-CHAT_HISTORY_TAIL:]:
+            _render_message(message)
         
         # File uploader
         uploaded_files = st.file_uploader(
@@ -200,7 +312,7 @@ def main():
                         session_id = upload_result["session_id"]
                         
                         # Log the image URLs
-                        logger.info(f"Received image URLs: {json.dumps(image_urls)}")
+                        logger.info("Received image URLs: %s", image_urls)
                         st.session_state.last_image_urls = image_urls
                         
                         # Process query with image URLs
@@ -227,6 +339,8 @@ def main():
                     # Store menu data and raw text if available
                     if "menu_data" in result:
                         st.session_state.menu_data = result["menu_data"]
+                        # Serialize once here rather than in st.json on every rerun
+                        st.session_state.menu_json = json_utils.dumps(result["menu_data"]).decode("utf-8")
                     
                     if "raw_extracted_text" in result:
                         st.session_state.raw_text = result["raw_extracted_text"]
@@ -242,7 +356,7 @@ def main():
     with data_tab:
         if "menu_data" in st.session_state and st.session_state.menu_data:
             # Display structured menu data
-            st.json(st.session_state.menu_data)
+            st.json(st.session_state.get("menu_json") or st.session_state.menu_data)
         else:
             st.info("Upload a menu image and ask a question to see structured menu data here.")
     
@@ -1,10 +1,22 @@
 import os
+import sys
 import time
 import streamlit as st
-import requests
 from typing import Dict, Any, Optional
 import tempfile
-import json
+
+# Streams multipart bodies from the file handle; requests' own files= encoding reads it all into memory
+try:
+    from requests_toolbelt.multipart.encoder import MultipartEncoder
+except ImportError:
+    MultipartEncoder = None
+
+# Add project root to Python path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
+sys.path.insert(0, project_root)
+
+from app.src.core.http_session import make_http_session
+from app.src.core import json_utils
 
 # Configure Streamlit page
 st.set_page_config(
@@ -16,7 +28,9 @@ st.set_page_config(
 
 # Constants
 API_BASE_URL = "http://127.0.0.1:8000/api"  # Updated to localhost for testing
-ALLOWED_EXTENSIONS = ['.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm']
+ALLOWED_EXTENSIONS = frozenset({'.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm'})
+UPLOAD_TYPES = sorted(ext.lstrip('.') for ext in ALLOWED_EXTENSIONS)
+JSON_HEADERS = {"Content-Type": "application/json"}
 
 # Initialize session state
 if "messages" not in st.session_state:
@@ -26,10 +40,15 @@ if "api_available" not in st.session_state:
     st.session_state.api_available = False
 
 # Helper functions
+@st.cache_resource
+def _get_http_session():
+    """Shared HTTP session so keep-alive connections survive Streamlit reruns"""
+    return make_http_session(retry_post=True)
+
 def check_api_connection():
     """Check if the API is available"""
     try:
-        response = requests.get(f"{API_BASE_URL}/video-transcription/health", timeout=5)
+        response = _get_http_session().get(f"{API_BASE_URL}/video-transcription/health", timeout=5)
         return response.status_code == 200
     except Exception:
         return False
@@ -37,14 +56,20 @@ def check_api_connection():
 def upload_video(file) -> Dict[str, Any]:
     """Upload a video file to the API"""
     try:
-        files = {"file": (file.name, file.getvalue(), "video/mp4")}
-        response = requests.post(
+        file.seek(0)
+        if MultipartEncoder is not None:
+            # Read the video in chunks as the body is sent instead of building it in memory
+            encoder = MultipartEncoder(fields={"file": (file.name, file, "video/mp4")})
+            request_kwargs = {"data": encoder, "headers": {"Content-Type": encoder.content_type}}
+        else:
+            request_kwargs = {"files": {"file": (file.name, file, "video/mp4")}}
+        response = _get_http_session().post(
             f"{API_BASE_URL}/video-transcription/upload",
-            files=files,
-            timeout=300  # 5 minutes timeout for large videos
+            timeout=300,  # 5 minutes timeout for large videos
+            **request_kwargs
         )
         response.raise_for_status()
-        return response.json()
+        return json_utils.loads(response.content)
     except Exception as e:
         st.error(f"Error uploading video: {str(e)}")
         return {"status": "error", "error": str(e)}
@@ -53,13 +78,14 @@ def query_video(question: str) -> Dict[str, Any]:
     """Query the video transcription with a question"""
     try:
         payload = {"question": question}
-        response = requests.post(
+        response = _get_http_session().post(
             f"{API_BASE_URL}/video-transcription/query",
-            json=payload,
+            data=json_utils.dumps(payload),
+            headers=JSON_HEADERS,
             timeout=30
         )
         response.raise_for_status()
-        return response.json()
+        return json_utils.loads(response.content)
     except Exception as e:
         st.error(f"Error querying video: {str(e)}")
         return {"answer": f"Error: {str(e)}"}
@@ -117,13 +143,13 @@ with tab1:
     if not st.session_state.api_available:
         st.warning("API not available. Please check the connection.")
     else:
-        uploaded_file = st.file_uploader("Choose a video file", type=["mp4", "avi", "mov", "mkv", "wmv", "flv", "webm"])
+        uploaded_file = st.file_uploader("Choose a video file", type=UPLOAD_TYPES)
         
         if uploaded_file is not None:
             # Check file extension
             file_ext = os.path.splitext(uploaded_file.name)[1].lower()
             if file_ext not in ALLOWED_EXTENSIONS:
-                st.error(f"Unsupported file format. Please upload one of: {', '.join(ALLOWED_EXTENSIONS)}")
+                st.error(f"Unsupported file format. Please upload one of: {', '.join(sorted(ALLOWED_EXTENSIONS))}")
             else:
                 # Show video preview
                 st.video(uploaded_file)
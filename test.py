@@ -20,13 +20,17 @@ IP_BASED_URLS = {
 
 # New domain-based URLs for the same applications
 DOMAIN_BASED_URLS = {
-    "trt-demo-driver-screening.demotrt.com": ["driver_screening_app.py", "http://13.200.205.196:8501/"],
-    "trt-demo-content-generator.demotrt.com": ["content_generator.py", "http://13.200.205.196:8502/"],
-    "trt-demo-grammer-checker.demotrt.com": ["grammer_check.py", "http://13.200.205.196:8503/"],
-    "trt-demo-performance-improver.demotrt.com": ["performance_analyzer.py", "http://13.200.205.196:8504/"],
-    "trt-demo-document-assistant.demotrt.com": ["document_rag_app.py", "http://13.200.205.196:8506/"],
-    "trt-demo-answer-verifier.demotrt.com": ["answer_verifier_app.py", "http://13.200.205.196:8507/"],
-    "trt-demo-medical-assistant.demotrt.com": ["medical_bot_app.py", "http://13.200.205.196:8508/"],
-    "trt-demo-video-transcriber.demotrt.com": ["video_transcription_app.py", "http://13.200.205.196:8509/"],
-    "trt-demo-interior-designer.demotrt.com": ["interior_design_app.py", "http://13.200.205.196:8510/"]
-}
\ No newline at end of file
+    "trt-demo-driver-screening.demotrt.com": ("driver_screening_app.py", "http://13.200.205.196:8501/"),
+    "trt-demo-content-generator.demotrt.com": ("content_generator.py", "http://13.200.205.196:8502/"),
+    "trt-demo-grammer-checker.demotrt.com": ("grammer_check.py", "http://13.200.205.196:8503/"),
+    "trt-demo-performance-improver.demotrt.com": ("performance_analyzer.py", "http://13.200.205.196:8504/"),
+    "trt-demo-document-assistant.demotrt.com": ("document_rag_app.py", "http://13.200.205.196:8506/"),
+    "trt-demo-answer-verifier.demotrt.com": ("answer_verifier_app.py", "http://13.200.205.196:8507/"),
+    "trt-demo-medical-assistant.demotrt.com": ("medical_bot_app.py", "http://13.200.205.196:8508/"),
+    "trt-demo-video-transcriber.demotrt.com": ("video_transcription_app.py", "http://13.200.205.196:8509/"),
+    "trt-demo-interior-designer.demotrt.com": ("interior_design_app.py", "http://13.200.205.196:8510/")
+}
+
+# Reverse lookups, built once so callers don't scan DOMAIN_BASED_URLS
+IP_TO_DOMAIN = {ip: domain for domain, (_, ip) in DOMAIN_BASED_URLS.items()}
+SCRIPT_TO_DOMAIN = {script: domain for domain, (script, _) in DOMAIN_BASED_URLS.items()}